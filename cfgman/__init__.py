@@ -12,20 +12,30 @@ It provides some utility to:
 """
 from collections.abc import Callable, Iterable, Iterator, Mapping, MutableMapping
 from dataclasses import MISSING, dataclass, fields, is_dataclass
-from typing import Any, TypeVar, cast
+from functools import lru_cache
+from types import UnionType
+from typing import Any, TypeVar, Union, cast, get_args, get_origin, get_type_hints
+from weakref import WeakSet
 
-from apischema import deserialize
 from typing_extensions import dataclass_transform
 
+from .deserialization import clear_cache, deserializer
 from .loaders import env_loader, file_loader  # noqa: F401
-from .tree import Node, NodePath, copy, ensure_path_prefix
+from .tree import Node, NodePath, copy, copy_value
 
 _T = TypeVar("_T")
 
 
-register = set[type]()
+# registered configclasses, kept for introspection only
+register: WeakSet[type] = WeakSet()
 defaults: dict[type, Any] = {}
 
+# attribute set on the configclasses
+_CONFIGCLASS_MARKER = "__cfgman_config__"
+
+# types that never contain configclasses
+_LEAF_TYPES = frozenset({str, bytes, int, float, bool, type(None)})
+
 __all__ = ["MISSING", "configclass", "load_config", "reset", "get_default_config"]
 
 
@@ -55,6 +65,9 @@ def configclass(cls: type[_T]) -> type[_T]:
         datacls = cls
 
     register.add(datacls)
+
+    # mark the class itself, this is what is used to recognize configclasses.
+    setattr(datacls, _CONFIGCLASS_MARKER, True)
     return datacls
 
 
@@ -62,6 +75,7 @@ def load_config(
     cls: type[_T],
     *sources: dict[str, Any]
     | Callable[[type[_T]], dict[str, Any] | list[dict[str, Any]]],
+    unsafe: bool = False,
 ) -> _T:
     """Load a configuration from multiple sources.
 
@@ -76,13 +90,18 @@ def load_config(
         cls: configuration class to use for both validation and deserialization.
         *sources: configuration sources. A source can be a regular `dict` or a
             [loader][cfgman.loaders].
+        unsafe: do not copy the sources while merging them. Faster, but any
+            source may be modified in place (the first one and the nodes
+            taken from the others) and the result may share nodes with the
+            sources. Use it only when the sources are not used anymore after
+            the call.
 
     Returns:
         An instance of the `configclass` with the data resulting from the merged
             sources.
 
     """
-    if cls not in register:
+    if not (isinstance(cls, type) and cls.__dict__.get(_CONFIGCLASS_MARKER, False)):
         raise ValueError("First argument of load_config must be a configclass.")
 
     unflattened_layers = (x(cls) if callable(x) else x for x in sources)
@@ -94,119 +113,238 @@ def load_config(
         else:
             layers.append(x)
 
-    config = deserialize(cls, _merge_layers(*layers), coerce=True)
+    # a single layer doesn't need to be copied when the config can't share any
+    # object with it and there is nothing to prune.
+    if (
+        len(layers) == 1
+        and not unsafe
+        and _has_only_scalar_fields(cls)
+        and not _has_missing(layers[0])
+    ):
+        merged = layers[0]
+    else:
+        merged = _merge_layers(*layers, unsafe=unsafe)
+
+    config = cast(_T, deserializer(cls)(merged))
 
     # set default configs
     # NOTE: if the same configclass appears multiple times, the last is the default one.
     for node in _visit_config(config):
         assert (
-            is_dataclass(node) and not isinstance(node, type) and type(node) in register
+            is_dataclass(node)
+            and not isinstance(node, type)
+            and type(node).__dict__[_CONFIGCLASS_MARKER]
         )
         defaults[type(node)] = node
 
     return config
 
 
-def _visit_config(obj: Any) -> Iterator[Any]:
-    """Visit the config tree and returns all registered configclasses."""
+def _visit_config(root: Any) -> Iterator[Any]:
+    """Visit the config tree and returns all registered configclasses.
+
+    The tree is visited depth-first using a stack instead of recursion; children
+    are pushed in reverse order so that nodes are returned in tree order.
+    """
+    stack = [root]
+
+    while stack:
+        obj = stack.pop()
+
+        # check the exact type of the most common values first, falling back to
+        # the slower abstract checks for everything else.
+        t: type = type(obj)
+
+        if t in _LEAF_TYPES or isinstance(obj, type):
+            # excludes cases where you have a class/type as a value
+            pass
+
+        elif t is dict:
+            stack.extend(reversed(obj.values()))
+
+        elif t is list or t is tuple:
+            stack.extend(reversed(obj))
+
+        elif is_dataclass(obj):
+            # only look in the class itself to exclude unregistered subclasses
+            if t.__dict__.get(_CONFIGCLASS_MARKER, False):
+                yield obj
+            stack.extend([getattr(obj, name) for name in reversed(_field_names(t))])
+
+        elif isinstance(obj, Mapping):
+            stack.extend(reversed(list(obj.values())))
+
+        elif isinstance(obj, str | bytes):
+            # exclude strings, otherwise they are considered iterables
+            pass
+
+        elif isinstance(obj, Iterable):
+            stack.extend(reversed(list(obj)))
+
+
+@lru_cache(maxsize=None)
+def _field_names(cls: type) -> tuple[str, ...]:
+    """Return the names of the fields of a dataclass."""
+    return tuple(f.name for f in fields(cls))
+
+
+def _has_only_scalar_fields(cls: type) -> bool:
+    """Check whether all the fields of a dataclass are scalars.
+
+    Nested dataclasses are fine if they have only scalar fields too. Such a
+    class never shares objects with the data it is deserialized from, while
+    containers and `Any` fields may be taken from the data as they are.
+    """
+    return _cached_has_only_scalar_fields(cls)
+
+
+@lru_cache(maxsize=None)
+def _cached_has_only_scalar_fields(cls: type) -> bool:
+    return _check_scalar_fields(cls, set())
+
+
+def _check_scalar_fields(cls: type, seen: set[type]) -> bool:
+    if cls in seen:
+        # already being checked, its fields decide the result
+        return True
+    seen.add(cls)
+
+    try:
+        hints = get_type_hints(cls)
+    except (NameError, TypeError):
+        return False
 
-    if isinstance(obj, type):
-        # excludes cases where you have a class/type as a value
-        pass
-    elif is_dataclass(obj):
-        if type(obj) in register:
-            yield obj
-        for f in fields(obj):
-            value = getattr(obj, f.name)
-            yield from _visit_config(value)
+    return all(_is_scalar_type(hints[name], seen) for name in _field_names(cls))
 
-    elif isinstance(obj, Mapping):
-        for value in obj.values():
-            yield from _visit_config(value)
 
-    elif isinstance(obj, str | bytes):
-        # exclude strings, otherwise they are considered iterables
-        pass
+def _is_scalar_type(tp: Any, seen: set[type]) -> bool:
+    if tp in _LEAF_TYPES:
+        return True
+    if get_origin(tp) in (Union, UnionType):
+        return all(_is_scalar_type(x, seen) for x in get_args(tp))
+    return isinstance(tp, type) and is_dataclass(tp) and _check_scalar_fields(tp, seen)
 
-    elif isinstance(obj, Iterable):
-        for value in obj:
-            yield from _visit_config(value)
 
+def _has_missing(tree: Mapping[str, Any]) -> bool:
+    """Check whether the tree contains MISSING values."""
+    for value in tree.values():
+        if value is MISSING or (isinstance(value, Mapping) and _has_missing(value)):
+            return True
+    return False
 
-def _merge_layers(*layers: dict[str, Any]) -> dict[str, Any]:
+
+def _merge_layers(*layers: dict[str, Any], unsafe: bool = False) -> dict[str, Any]:
     """Merge multiple layers into a single one following magic rules.
 
     Rules:
     - an item is replaced if it is not a dict or a list.
-    - dict are merged recusively.
+    - dict are merged recusively, other mappings are merged as dict.
     - lists are joined.
     - nodes containing a MISSING value are pruned.
+    - empty dicts of the layers after the first one don't add nodes.
+
+    The layers are copied unless `unsafe` is set, in that case the first one
+    is changed in-place and the nodes of the others are taken as they are
+    (after pruning them in-place) when there is nothing to merge them with.
     """
+    if not layers:
+        return {}
+
+    # with a single unsafe layer there is nothing to copy nor to merge: the
+    # layer is only pruned.
     head, *tail = layers
-    current = copy(head)
+    current = head if unsafe else copy(head)
+    _prune_missing_inplace(current)
 
     for layer in tail:
-        for node_path, node_value in _visit_dict(layer):
-            _merge_node_path(current, node_path, node_value)
+        _merge_into(current, layer, unsafe=unsafe)
 
-    _prune_missing_inplace(current)
     return current
 
 
-def _prune_missing_inplace(d: MutableMapping[str, Any]) -> None:
-    """Prune all nodes containing a MISSING values."""
+def _prune_missing_inplace(
+    tree: MutableMapping[str, Any], drop_empty: bool = False
+) -> None:
+    """Prune all nodes containing a MISSING values.
+
+    If `drop_empty`, also prune the nodes that are (or end up) empty dicts.
+    """
 
     to_del = []
 
-    for k, v in d.items():
+    for k, v in tree.items():
         if v is MISSING:
             to_del.append(k)
-        elif isinstance(v, MutableMapping) and v:
-            _prune_missing_inplace(v)
+        elif isinstance(v, Mapping):
+            if v:
+                if not isinstance(v, MutableMapping):
+                    # read-only mappings can't be pruned in-place, prune a copy
+                    v = tree[k] = copy_value(v)
+                _prune_missing_inplace(v, drop_empty)
+            if drop_empty and not v:
+                to_del.append(k)
 
     for k in to_del:
-        del d[k]
-
-
-def _visit_dict(root: Node) -> Iterator[tuple[list[str], Any]]:
-    """Visit the tree of a dict and yields all node paths.
-
-    Each nested dictionary is visited recursively.
-    """
-    for key, value in root.items():
-        if isinstance(value, dict):
-            value = cast(Node, value)
-            for node_path, node_value in _visit_dict(value):
-                yield [key] + node_path, node_value
-        else:
-            yield [key], value
+        del tree[k]
 
 
-def _merge_node_path(tree: Node, path: NodePath, new_value: Any) -> None:
-    """Merge the value of a node path with the new value.
+def _merge_into(
+    tree: Node, layer: Node, path: NodePath = (), *, unsafe: bool = False
+) -> None:
+    """Merge a layer into the tree, visiting both of them in lockstep.
 
-    The values is overridden if it is not a list, otherwise the two lists are
-    concatenated.
+    Dicts and lists of the layer are never added to the tree as they are: they
+    are merged or copied, so the tree doesn't share them with the layer.
+    If `unsafe`, they are pruned and added in-place when the tree has no dict or
+    list to merge them with.
     """
-    node, key = ensure_path_prefix(tree, path)
-
-    # don't make any change if the new value is missing
-    if new_value is MISSING:
-        return
+    for key, new_value in layer.items():
+        # don't make any change if the new value is missing
+        if new_value is MISSING:
+            continue
+
+        # exact types are the fast path, subclasses fall back to isinstance
+        value_type = type(new_value)
+
+        if value_type in _LEAF_TYPES:
+            tree[key] = new_value
+
+        elif value_type is dict or isinstance(new_value, Mapping):
+            current_value = tree.get(key)
+            if type(current_value) is dict or isinstance(current_value, dict):
+                _merge_into(current_value, new_value, (*path, key), unsafe=unsafe)
+            elif isinstance(current_value, Mapping):
+                # other mappings can't be changed in-place, merge into a copy
+                current_value = tree[key] = copy_value(current_value)
+                _merge_into(current_value, new_value, (*path, key), unsafe=unsafe)
+            elif unsafe and isinstance(new_value, dict):
+                # same result of the safe merge below: no MISSING nor empty nodes
+                _prune_missing_inplace(new_value, drop_empty=True)
+                if new_value:
+                    tree[key] = new_value
+            else:
+                subtree: Node = {}
+                _merge_into(subtree, new_value, (*path, key))
+                # later layers don't add empty nodes
+                if subtree:
+                    tree[key] = subtree
+
+        elif value_type is list or isinstance(new_value, list):
+            current_value = tree.get(key, MISSING)
+            if current_value is MISSING:
+                tree[key] = new_value if unsafe else copy_value(new_value)
+            elif not isinstance(current_value, list):
+                raise TypeError(
+                    f"Setting {'.'.join((*path, key))} has mixed type 'list' and"
+                    " non-'list'."
+                )
+            elif unsafe:
+                current_value.extend(new_value)
+            else:
+                current_value.extend(map(copy_value, new_value))
 
-    if isinstance(new_value, list):
-        current_value = node.get(key, MISSING)
-        if current_value is MISSING:
-            current_value = node[key] = []
-
-        if not isinstance(current_value, list):
-            raise TypeError(
-                f"Setting {'.'.join(path)} has mixed type 'list' and non-'list'."
-            )
         else:
-            current_value.extend(new_value)
-    else:
-        node[key] = new_value
+            tree[key] = new_value
 
 
 def get_default_config(cls: type[_T]) -> _T:
@@ -234,9 +372,12 @@ def get_default_config(cls: type[_T]) -> _T:
 
 
 def reset() -> None:
-    """Reset the default configclasses.
+    """Reset the default configclasses and the caches about them.
 
     *Warning*: this is an utility function for tests, you hardly need to use
     this in your app.
     """
     defaults.clear()
+    _field_names.cache_clear()
+    _cached_has_only_scalar_fields.cache_clear()
+    clear_cache()
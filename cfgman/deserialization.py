@@ -0,0 +1,26 @@
+"""Cached apischema deserialization methods."""
+from collections.abc import Callable
+from typing import Any
+
+import apischema
+from apischema.cache import cache
+
+
+def deserializer(cls: type, coerce: bool = True) -> Callable[[Any], Any]:
+    """Return the deserialization method for `cls`, coercing values if `coerce`.
+
+    Building the method is expensive, so it is built only once per class. The
+    cache is cleared by apischema together with its own caches, e.g. when the
+    settings change.
+    """
+    return _deserialization_method(cls, coerce)
+
+
+def clear_cache() -> None:
+    """Clear the cached deserialization methods."""
+    _deserialization_method.cache_clear()  # type: ignore[attr-defined]
+
+
+@cache
+def _deserialization_method(cls: type, coerce: bool) -> Callable[[Any], Any]:
+    return apischema.deserialization_method(cls, coerce=coerce)
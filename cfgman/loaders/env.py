@@ -5,9 +5,8 @@ from collections.abc import Callable, Mapping, Sequence
 from functools import partial
 from typing import Any, TypeVar
 
-from apischema import deserialize
-
-from cfgman.tree import ensure_path_prefix, envelop_subpath
+from cfgman.deserialization import deserializer
+from cfgman.tree import envelop_subpath, split_path
 
 _T = TypeVar("_T")
 
@@ -28,6 +27,11 @@ def load_env(
 
     Missing variables are ignored.
 
+    Variable names are looked up either uppercase or lowercase (e.g. `VAR1` and
+    `var1`), regardless of the case used in the mapping and in the prefix.
+    Mixed-case variables (e.g. `Var1`) are not matched, unless the environment
+    is case-insensitive like [`os.environ`][os.environ] on Windows.
+
     Examples:
         >>> load_env(
         ...   mapping={"VAR1": "a.b", "VAR2": "a.c", "MISS": "b.c"},
@@ -48,37 +52,13 @@ def load_env(
         A `dict` that can be used as a source for the configuration.
             See [load_config][cfgman.load_config].
     """
-    if env is None:
-        env = os.environ
-
-    if validate and cls is None:
-        raise ValueError("Validation require `cls` being set.")
-
-    # normalize keys to be case-insensitive and add prefix in the mapping keys
-    env = {k.upper(): v for k, v in env.items()}
-    mapping = {prefix + k.upper(): v for k, v in mapping.items()}
-
-    result: dict[str, Any] = {}
-
-    # iterate all mapping keys and populate the result tree
-    for varname, nodepath in mapping.items():
-        if varname not in env:
-            continue
-
-        node, key = ensure_path_prefix(result, nodepath.split("."))
-        node[key] = env[varname]
-
-    if validate:
-        deserialize(cls, result, coerce=True)
-
-    # envelop the result in a subpath if required.
-    if subpath is None:
-        return result
-
-    if isinstance(subpath, str):
-        subpath = subpath.split(".")
-
-    return envelop_subpath(result, subpath)
+    return _load_env_compiled(
+        cls,
+        compiled_mapping=_compile_mapping(mapping, prefix),
+        subpath=subpath,
+        validate=validate,
+        env=env,
+    )
 
 
 def env_loader(
@@ -108,12 +88,14 @@ def env_loader(
         A function that can be used as a source for the configuration.
             See [load_config][cfgman.load_config].
     """
+    if isinstance(subpath, str):
+        subpath = split_path(subpath)
+
     wrapped_func = partial(
-        load_env,
-        mapping=mapping,
+        _load_env_compiled,
+        compiled_mapping=_compile_mapping(mapping, prefix),
         validate=validate,
         subpath=subpath,
-        prefix=prefix,
         env=env,
     )
 
@@ -121,3 +103,66 @@ def env_loader(
         return wrapped_func
     else:
         return lambda x: wrapped_func(cls)
+
+
+CompiledMapping = list[tuple[str, tuple[str, ...], str]]
+
+
+def _compile_mapping(mapping: Mapping[str, str], prefix: str) -> CompiledMapping:
+    """Return the list of `(envvar, parent path, key)` of a mapping.
+
+    The prefix is added to the variable names and they are normalized to
+    uppercase.
+    """
+    compiled = []
+    for k, v in mapping.items():
+        *parent_path, key = split_path(v)
+        compiled.append(((prefix + k).upper(), tuple(parent_path), key))
+    return compiled
+
+
+def _load_env_compiled(
+    cls: type[_T] | None = None,
+    *,
+    compiled_mapping: CompiledMapping,
+    subpath: str | Sequence[str] | None = None,
+    validate: bool = False,
+    env: Mapping[str, str] | None = None,
+) -> dict[str, Any]:
+    """Load a dict from environment variables given a compiled mapping.
+
+    See [`load_env`][cfgman.loaders.env.load_env].
+    """
+    if env is None:
+        env = os.environ
+
+    if validate and cls is None:
+        raise ValueError("Validation require `cls` being set.")
+
+    result: dict[str, Any] = {}
+
+    # iterate all mapping keys and populate the result tree, looking up only
+    # the variables we need instead of normalizing the whole environment.
+    for varname, parent_path, key in compiled_mapping:
+        value = env.get(varname)
+        if value is None:
+            value = env.get(varname.lower())
+            if value is None:
+                continue
+
+        node = result
+        for k in parent_path:
+            node = node.setdefault(k, {})
+        node[key] = value
+
+    if validate and cls is not None:
+        deserializer(cls)(result)
+
+    # envelop the result in a subpath if required.
+    if subpath is None:
+        return result
+
+    if isinstance(subpath, str):
+        subpath = split_path(subpath)
+
+    return envelop_subpath(result, subpath)
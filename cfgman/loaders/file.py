@@ -5,8 +5,10 @@ Support multiple file formats and multiple files.
 
 """
 import json
+import sys
 from collections.abc import Callable, Iterable, Sequence
 from functools import partial
+from importlib.util import find_spec
 from pathlib import Path
 from typing import Any, TypeVar, cast
 
@@ -18,22 +20,13 @@ from cfgman.errors import (
     UnsupportedFileType,
     ValidationError,
 )
-from cfgman.tree import envelop_subpath
+from cfgman.deserialization import deserializer
+from cfgman.tree import envelop_subpath, split_path
 from cfgman.types import FileType
 
-try:
-    import yaml
-
-    YAML_EXISTS = True
-except KeyError:  # pragma: no cover
-    YAML_EXISTS = False
-
-try:
-    import tomli
-
-    TOML_EXISTS = True
-except KeyError:  # pragma: no cover
-    TOML_EXISTS = False
+# optional parsers are imported only when a file requires them
+YAML_EXISTS = find_spec("yaml") is not None
+TOML_EXISTS = sys.version_info >= (3, 11) or find_spec("tomli") is not None
 
 
 _T = TypeVar("_T")
@@ -107,17 +100,18 @@ def load_file(
 
     # check against the schema
     if validate:
+        validator = deserializer(cls)
         for fname, content in zip(paths, contents):
             try:
-                apischema.deserialize(cls, content, coerce=True)
+                validator(content)
             except apischema.ValidationError as errors:
                 raise ValidationError(str(fname), errors)
 
-    if subpath is None:
+    if subpath is None or not contents:
         return contents
 
     if isinstance(subpath, str):
-        subpath = subpath.split(".")
+        subpath = split_path(subpath)
 
     return [envelop_subpath(x, subpath) for x in contents]
 
@@ -152,6 +146,9 @@ def file_loader(
         A function that can be used as a source for the configuration.
             See [load_config][cfgman.load_config].
     """
+    if isinstance(subpath, str):
+        subpath = split_path(subpath)
+
     wrapped_func = partial(
         load_file,
         subpath=subpath,
@@ -180,12 +177,18 @@ def _load_single_file(
         if file_type not in supported_file_types:
             raise UnsupportedFileType(file_type=file_type, filename=str(filename))
 
-        match filename.suffix:
-            case ".json":
-                return cast(dict[str, Any], json.load(fin))
-            case ".yaml" | ".yml":
-                return cast(dict[str, Any], yaml.safe_load(fin))
-            case ".toml":
-                return tomli.load(fin)
-            case _:
-                assert False, "This should never happen."
+        if file_type is FileType.JSON:
+            return cast(dict[str, Any], json.load(fin))
+        elif file_type is FileType.YAML:
+            import yaml
+
+            return cast(dict[str, Any], yaml.safe_load(fin))
+        elif file_type is FileType.TOML:
+            if sys.version_info >= (3, 11):
+                import tomllib
+            else:
+                import tomli as tomllib
+
+            return tomllib.load(fin)
+        else:
+            assert False, "This should never happen."
@@ -5,40 +5,24 @@ either trees or Any.
 
 """
 from collections.abc import Mapping, Sequence
-from typing import Any, NamedTuple
+from functools import lru_cache
+from typing import Any
 
 NodePath = Sequence[str]
 Node = dict[str, Any]
 
 
-class ItemPtr(NamedTuple):
-    node: Node
-    key: str
+@lru_cache(maxsize=256)
+def split_path(dotted_path: str) -> tuple[str, ...]:
+    """Split a dotted path into its keys.
 
+    Paths are usually the same for all calls, so results are cached.
 
-def ensure_path_prefix(tree: Node, path: NodePath) -> ItemPtr:
-    """Ensure the path prefix exists in the tree and return the item pointer.
-
-    NOTE: this function change the tree in-place, adding the required path
-    nodes.
-
-    >>> ensure_path_prefix({}, ("a", "b", "c")) == ItemPtr({}, "c")
-    True
-    >>> tree = {"a": {}}
-    >>> ensure_path_prefix(tree, ("a", "b", "c"))
-    ItemPtr(node={}, key="c")
-    >>> tree == {"a": {"b": {}}}
-    True
+    >>> split_path("a.b.c")
+    ('a', 'b', 'c')
 
     """
-    if not path:
-        raise ValueError("path must contain at least one element.")
-
-    node = tree
-    *partial_path, last_key = path
-    for key in partial_path:
-        node = node.setdefault(key, {})
-    return ItemPtr(node, last_key)
+    return tuple(dotted_path.split("."))
 
 
 def envelop_subpath(tree: Node, subpath: NodePath) -> Node:
@@ -53,17 +37,22 @@ def copy(tree: Node) -> Node:
     """Copy a tree.
 
     This is not a shallow copy of the dict: it recursively copy all contained
-    dicts. It also copies all lists in the tree.
+    dicts and lists, including the ones contained in lists. Other mappings are
+    copied into dicts.
 
-    It is not a deep copy either: lists are not recursively copies and we are
-    not going to copy any other object as they should be immutable or treated
-    as those by the rest of the tree operations.
+    It is not a deep copy either: we are not going to copy any other object as
+    they should be immutable or treated as those by the rest of the tree
+    operations. Those objects are shared with the original tree.
 
     """
-    tree = tree.copy()
-    for k, v in tree.items():
-        if isinstance(v, Mapping):
-            tree[k] = copy(tree[k])
-        elif isinstance(v, list):
-            tree[k] = v.copy()
-    return tree
+    return {k: copy_value(v) for k, v in tree.items()}
+
+
+def copy_value(value: Any) -> Any:
+    """Copy a value of a tree, see [`copy`][cfgman.tree.copy]."""
+    t = type(value)
+    if t is dict or isinstance(value, Mapping):
+        return {k: copy_value(v) for k, v in value.items()}
+    if t is list or isinstance(value, list):
+        return [copy_value(v) for v in value]
+    return value
@@ -64,3 +64,18 @@ def test_env_loader(mocker: MockerFixture) -> None:
         "name": "myapp",
         "web": {"host": "127.0.0.1", "port": 8080},
     }
+
+
+def test_env_loader_variable_case() -> None:
+    loader = env_loader(
+        mapping={"host": "web.host", "port": "web.port", "name": "name"},
+        prefix="app_",
+        env={"APP_HOST": "127.0.0.1", "app_name": "myapp", "App_Port": "8080"},
+    )
+
+    # the loader can be called multiple times
+    for _ in range(2):
+        assert loader(ApplicationConfig) == {
+            "name": "myapp",
+            "web": {"host": "127.0.0.1"},
+        }
@@ -1,8 +1,18 @@
-from dataclasses import asdict
+import gc
+import weakref
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from types import MappingProxyType
+from typing import Any, cast
 
+import apischema
+import pytest
 from apischema import serialize
 
+import cfgman
 from cfgman import MISSING, configclass, get_default_config, load_config
+from cfgman.deserialization import deserializer
 
 
 @configclass
@@ -24,6 +34,27 @@ class ConfigWithDefaults:
     number: int = 10
 
 
+@configclass
+class ConfigWithOptional:
+    name: str
+    web: WebServerConfig | None = None
+
+
+@configclass
+class ConfigWithAny:
+    items: list[Any]
+
+
+@configclass
+class ConfigWithOptions:
+    opts: dict[str, Any]
+
+
+@configclass
+class ConfigWithLongName:
+    some_name: str
+
+
 def test_nested_config() -> None:
     config = load_config(
         Config,
@@ -104,3 +135,204 @@ def test_missing_with_defaults() -> None:
         "name": "default",
         "number": 20,
     }
+
+
+def test_merge_does_not_change_sources() -> None:
+    base = {"name": "foo", "values": [1], "web": {"host": "localhost", "port": 80}}
+    load_config(Config, base, {"values": [2], "web": {"port": 8080}})
+
+    assert base == {
+        "name": "foo",
+        "values": [1],
+        "web": {"host": "localhost", "port": 80},
+    }
+
+
+def test_single_layer_does_not_change_source() -> None:
+    base: dict[str, Any] = {"opts": {"a": {"b": 1}, "k": [1]}}
+    config = load_config(ConfigWithOptions, base)
+    config.opts["a"]["c"] = 2
+    config.opts["k"].append(2)
+
+    assert base == {"opts": {"a": {"b": 1}, "k": [1]}}
+
+
+def test_single_layer_scalar_fields() -> None:
+    config = load_config(
+        ConfigWithOptional, {"name": "foo", "web": {"host": "h", "port": "80"}}
+    )
+    assert asdict(config) == {"name": "foo", "web": {"host": "h", "port": 80}}
+
+    config_with_defaults = load_config(ConfigWithDefaults, {"number": "20"})
+    assert asdict(config_with_defaults) == {"name": "default", "number": 20}
+
+
+def test_unsafe() -> None:
+    config = load_config(
+        Config,
+        {"name": "foo", "values": [1], "web": {"host": "localhost", "port": 80}},
+        {"values": [2], "web": {"port": 8080}},
+        unsafe=True,
+    )
+
+    assert asdict(config) == {
+        "name": "foo",
+        "values": [1, 2],
+        "web": {"host": "localhost", "port": 8080},
+    }
+
+
+def test_unsafe_new_subtree() -> None:
+    config = load_config(
+        Config,
+        {"name": "foo", "web": "invalid"},
+        {"web": {"host": "localhost", "port": 80}, "values": [1]},
+        unsafe=True,
+    )
+
+    assert asdict(config) == {
+        "name": "foo",
+        "values": [1],
+        "web": {"host": "localhost", "port": 80},
+    }
+
+
+def test_dict_subclasses() -> None:
+    base = OrderedDict(a={"x": 1}, b=1)
+    config = load_config(
+        ConfigWithOptions,
+        {"opts": base},
+        {"opts": OrderedDict(a={"y": 2}, c=3)},
+    )
+
+    assert config.opts == {"a": {"x": 1, "y": 2}, "b": 1, "c": 3}
+    assert base == {"a": {"x": 1}, "b": 1}
+
+
+@pytest.mark.parametrize("unsafe", [False, True])
+def test_other_mappings(unsafe: bool) -> None:
+    config = load_config(
+        ConfigWithOptions,
+        {"opts": MappingProxyType({"a": MappingProxyType({"x": 1}), "m": MISSING})},
+        {"opts": {"a": {"y": 2}}},
+        unsafe=unsafe,
+    )
+
+    assert config.opts == {"a": {"x": 1, "y": 2}}
+
+
+def test_empty_dict_in_later_layer() -> None:
+    config = load_config(ConfigWithOptional, {"name": "foo"}, {"web": {}})
+
+    assert config.web is None
+
+
+@pytest.mark.parametrize("unsafe", [False, True])
+def test_no_layers(unsafe: bool) -> None:
+    config = load_config(ConfigWithDefaults, unsafe=unsafe)
+
+    assert asdict(config) == {"name": "default", "number": 10}
+
+
+def test_unsafe_missing() -> None:
+    config = load_config(
+        Config,
+        {"name": MISSING, "values": [1]},
+        {"name": "foo", "web": {"host": "localhost", "port": 80, "x": MISSING}},
+        unsafe=True,
+    )
+
+    assert asdict(config) == {
+        "name": "foo",
+        "values": [1],
+        "web": {"host": "localhost", "port": 80},
+    }
+
+
+@pytest.mark.parametrize(
+    "cls, make_layers",
+    [
+        (ConfigWithOptional, lambda: [{"name": "x"}, {"web": {"extra": {}}}]),
+        (
+            ConfigWithOptional,
+            lambda: [{"name": "x"}, {"web": {"inner": {"x": MISSING}}}],
+        ),
+        (
+            ConfigWithOptions,
+            lambda: [
+                {"opts": {"a": 1}},
+                {
+                    "opts": {
+                        "b": {"extra": {}},
+                        "c": {"inner": {"x": MISSING}},
+                        "d": {"e": {}, "f": 1},
+                    }
+                },
+            ],
+        ),
+    ],
+)
+def test_unsafe_same_result(
+    cls: type, make_layers: Callable[[], list[dict[str, Any]]]
+) -> None:
+    config: object = load_config(cls, *make_layers())
+    unsafe_config: object = load_config(cls, *make_layers(), unsafe=True)
+
+    assert unsafe_config == config
+
+
+def test_mixed_list() -> None:
+    with pytest.raises(TypeError, match="web.host"):
+        load_config(Config, {"web": {"host": "foo"}}, {"web": {"host": ["bar"]}})
+
+
+def test_merge_copies_lists_content() -> None:
+    base: dict[str, Any] = {"items": [{"a": 1}]}
+    config = load_config(ConfigWithAny, base, {"items": [{"b": 2}]})
+    config.items[0]["a"] = 10
+
+    assert base == {"items": [{"a": 1}]}
+    assert config.items == [{"a": 10}, {"b": 2}]
+
+
+def test_load_config_requires_configclass() -> None:
+    @dataclass
+    class NotRegistered(ConfigWithDefaults):
+        pass
+
+    with pytest.raises(ValueError):
+        load_config(NotRegistered, {})
+
+    with pytest.raises(ValueError):
+        load_config(cast(Any, "not a class"), {})
+
+
+def test_settings_change() -> None:
+    load_config(ConfigWithLongName, {"some_name": "x"})
+
+    apischema.settings.camel_case = True
+    try:
+        config = load_config(ConfigWithLongName, {"someName": "y"})
+    finally:
+        apischema.settings.camel_case = False
+
+    assert config.some_name == "y"
+
+
+def test_reset_clears_caches() -> None:
+    load_config(ConfigWithDefaults, {})
+    method = deserializer(ConfigWithDefaults)
+    cfgman.reset()
+
+    assert deserializer(ConfigWithDefaults) is not method
+
+
+def test_register_does_not_keep_classes() -> None:
+    cls: type = configclass(type("Tmp", (), {"__annotations__": {"x": int}}))
+    assert cls in cfgman.register
+
+    ref = weakref.ref(cls)
+    del cls
+    gc.collect()
+
+    assert ref() is None